@@ -3,11 +3,16 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from amplifier_core import ModuleCoordinator
+from ._bd import bd_available, beads_db_exists, call_bd
 
-from .hooks import BeadsReadyHook, BeadsSessionEndHook, BeadsWorkflowReminderHook
+if TYPE_CHECKING:
+    from amplifier_core import ModuleCoordinator
+
+    # Static-analysis view of the lazy re-exports below: at runtime these
+    # resolve through __getattr__ so importing the package stays cheap
+    from .hooks import BeadsReadyHook, BeadsSessionEndHook, BeadsWorkflowReminderHook
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +24,35 @@ __all__ = [
 ]
 
 
+def __getattr__(name: str) -> Any:
+    # Keep the hook classes importable from the package without paying
+    # for the hooks module (and its transitive amplifier_core import)
+    # just to import this package
+    if name in ("BeadsReadyHook", "BeadsSessionEndHook", "BeadsWorkflowReminderHook"):
+        from . import hooks
+
+        return getattr(hooks, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def _beads_usable(beads_dir: str | None) -> bool:
+    """One-time mount probe: can bd answer queries here at all?
+
+    If beads isn't initialized for this workspace, the workflow reminder
+    could never fire, so mount() skips registering its per-tool-call
+    tracking entirely rather than paying for it on every tool call
+    forever. Re-mounting retries the probe.
+    """
+    if not beads_db_exists(beads_dir):
+        logger.info("no beads database found - skipping workflow reminder hooks")
+        return False
+
+    success, _ = await call_bd(["list", "--status", "in_progress"], beads_dir=beads_dir)
+    if not success:
+        logger.info("beads not initialized - skipping workflow reminder hooks")
+    return success
+
+
 async def mount(coordinator: ModuleCoordinator, config: dict[str, Any] | None = None) -> None:
     """Mount beads hooks for ready work injection and workflow reminders.
 
@@ -36,16 +70,31 @@ async def mount(coordinator: ModuleCoordinator, config: dict[str, Any] | None =
     hooks_config = config.get("hooks", {})
     beads_dir = config.get("beads_dir")
 
+    # Capability-check once here instead of on every hook fire: if the bd
+    # CLI isn't installed no handler could ever do anything, so don't put
+    # any of them on the event loop's dispatch path
+    if not bd_available():
+        logger.info("bd CLI not installed - beads hooks disabled")
+        return
+
+    # Imported here rather than at module top so that merely importing the
+    # package (or bailing out above) never loads the hook machinery;
+    # Python's module cache makes re-mounts a dict hit
+    from .hooks import BeadsReadyHook, BeadsSessionEndHook, BeadsWorkflowReminderHook
+
     # Ready hook - injects ready tasks on first LLM request
     ready_config = hooks_config.get("ready", {})
     if ready_config.get("enabled", True):
-        ready_hook = BeadsReadyHook(ready_config, beads_dir=beads_dir)
+        ready_hook = BeadsReadyHook(ready_config, beads_dir=beads_dir, coordinator=coordinator)
         coordinator.hooks.register(
             event="provider:request",
             handler=ready_hook.on_provider_request,
             priority=ready_hook.priority,
             name="beads-ready",
         )
+        # Warm the bd ready result so the first LLM request doesn't block
+        # on a cold bd invocation
+        ready_hook.start_prefetch()
         logger.info("Registered beads-ready hook on provider:request")
 
     # Session end hook - updates claimed issues when session ends
@@ -62,7 +111,7 @@ async def mount(coordinator: ModuleCoordinator, config: dict[str, Any] | None =
 
     # Workflow reminder hook - periodic nudges about discovered work and closing issues
     workflow_config = hooks_config.get("workflow_reminder", {})
-    if workflow_config.get("enabled", True):
+    if workflow_config.get("enabled", True) and await _beads_usable(beads_dir):
         workflow_hook = BeadsWorkflowReminderHook(workflow_config, beads_dir=beads_dir)
         # Register on tool:post to track tool usage
         coordinator.hooks.register(
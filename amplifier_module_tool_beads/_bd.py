@@ -0,0 +1,414 @@
+"""Shared bd CLI plumbing for the beads hooks.
+
+Single home for process spawning, the persistent bd server client, the
+short-TTL result cache, and JSON parsing helpers, so every hook shares
+one implementation (and one cache) instead of redefining its own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from collections.abc import Iterator
+from typing import Any
+
+try:
+    # orjson parses 2-5x faster than stdlib json and accepts bytes directly
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+try:
+    # ijson enables incremental parsing so large bd list outputs never
+    # materialize as a full in-memory list
+    import ijson
+except ImportError:
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+
+def iter_issues(output: bytes | str) -> Iterator[dict[str, Any]]:
+    """Yield issues from bd list/ready JSON output one at a time.
+
+    Streams with ijson when installed (O(1) memory, early exit friendly);
+    falls back to a one-shot parse otherwise. Handles both the bare-list
+    and {"issues": [...]} output shapes.
+    """
+    raw = output if isinstance(output, bytes) else output.encode()
+    if ijson is not None:
+        prefix = "item" if raw.lstrip()[:1] == b"[" else "issues.item"
+        try:
+            yield from ijson.items(io.BytesIO(raw), prefix)
+        except ijson.JSONError as e:
+            # ijson's errors don't subclass ValueError the way
+            # json.JSONDecodeError does; normalize so callers need only
+            # one except clause regardless of which parser is installed
+            raise ValueError(str(e)) from e
+        return
+
+    data = _json_loads(raw)
+    yield from data if isinstance(data, list) else data.get("issues", [])
+
+
+# Resolved bd path, cached so hot hook paths don't re-walk PATH on every call.
+# functools.cache also lets tests clear it via bd_path.cache_clear().
+@functools.cache
+def bd_path() -> str | None:
+    """Resolve the absolute path to the bd CLI once per process."""
+    return shutil.which("bd")
+
+
+def bd_available() -> bool:
+    """Check if bd CLI is available."""
+    return bd_path() is not None
+
+
+# beads_dirs where a database has been seen. Only positive results are
+# remembered: a database doesn't vanish mid-session, but `bd init` can
+# create one, so negatives get re-checked (a stat is cheap).
+_beads_dbs_seen: set[str | None] = set()
+
+
+def beads_db_exists(beads_dir: str | None) -> bool:
+    """Check for a beads database without spawning bd.
+
+    With a centralized beads_dir the marker is that directory itself;
+    otherwise it's .beads/ in the current working directory. One stat
+    instead of a doomed fork+exec on projects that don't use beads.
+    """
+    if beads_dir in _beads_dbs_seen:
+        return True
+
+    if beads_dir:
+        found = os.path.isdir(os.path.expanduser(beads_dir))
+    else:
+        found = os.path.isdir(".beads")
+
+    if found:
+        _beads_dbs_seen.add(beads_dir)
+    return found
+
+
+# Env dicts are invariant per beads_dir, so build them once instead of
+# copying os.environ on every subprocess call. None means "inherit".
+@functools.cache
+def _bd_env(beads_dir: str | None) -> dict[str, str] | None:
+    """Build the subprocess environment for a beads_dir (None = inherit)."""
+    if not beads_dir:
+        return None
+    return {**os.environ, "BEADS_DIR": os.path.expanduser(beads_dir)}
+
+
+def run_bd(
+    args: list[str],
+    json_output: bool = True,
+    beads_dir: str | None = None,
+    capture: bool = True,
+) -> tuple[bool, bytes | str]:
+    """Run a bd command and return (success, output).
+
+    Output is raw bytes on success (fed straight into the JSON parser,
+    skipping an intermediate UTF-8 decode); error messages are str.
+    Pass capture=False for fire-and-forget calls so output goes to
+    DEVNULL instead of being copied into Python memory and discarded.
+    """
+    cmd = [bd_path() or "bd"] + args
+    if json_output:
+        cmd.append("--json")
+
+    env = _bd_env(beads_dir)
+
+    try:
+        if not capture:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10,
+                env=env,
+            )
+            return result.returncode == 0, ""
+
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            timeout=10,
+            env=env,
+        )
+        if result.returncode == 0:
+            # No .strip(): that would copy the whole payload, and the JSON
+            # parsers downstream tolerate surrounding whitespace anyway
+            return True, result.stdout
+        else:
+            stderr = result.stderr.strip() or result.stdout.strip()
+            return False, stderr.decode("utf-8", "replace")
+    except subprocess.TimeoutExpired:
+        return False, "Command timed out"
+    except Exception as e:
+        return False, str(e)
+
+
+async def run_bd_async(
+    args: list[str],
+    json_output: bool = True,
+    beads_dir: str | None = None,
+    capture: bool = True,
+) -> tuple[bool, bytes | str]:
+    """Run a bd command via asyncio subprocess, without blocking the event loop.
+
+    Same contract as run_bd, but safe to dispatch concurrently with
+    asyncio.gather (e.g. the session-end update fan-out).
+    """
+    cmd = [bd_path() or "bd"] + args
+    if json_output:
+        cmd.append("--json")
+
+    env = _bd_env(beads_dir)
+
+    pipe = asyncio.subprocess.PIPE if capture else asyncio.subprocess.DEVNULL
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=pipe,
+            stderr=pipe,
+            env=env,
+        )
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=10)
+        if proc.returncode == 0:
+            return True, stdout if capture else b""
+        elif not capture:
+            return False, ""
+        else:
+            return False, (stderr.strip() or stdout.strip()).decode("utf-8", "replace")
+    except TimeoutError:
+        proc.kill()
+        return False, "Command timed out"
+    except Exception as e:
+        return False, str(e)
+
+
+async def batch_update_notes(
+    issue_ids: list[str], note: str, beads_dir: str | None = None
+) -> bool:
+    """Apply the same --notes update to many issues in one bd invocation.
+
+    Feeds a JSON array to `bd update --batch -` so N updates cost one
+    process and one database transaction instead of N. Returns False when
+    bd predates the --batch flag (or anything else fails) so the caller
+    can fall back to per-issue updates.
+    """
+    payload = json.dumps([{"id": iid, "notes": note} for iid in issue_ids]).encode()
+    invalidate_bd_cache()
+
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            bd_path() or "bd",
+            "update",
+            "--batch",
+            "-",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=_bd_env(beads_dir),
+        )
+        await asyncio.wait_for(proc.communicate(payload), timeout=10)
+        return proc.returncode == 0
+    except Exception as e:
+        logger.debug(f"bd batch update unavailable: {e}")
+        return False
+
+
+class _BdClient:
+    """Long-lived bd server process shared by all hooks in a session.
+
+    Spawning a fresh bd process per call pays fork+exec+startup+database-open
+    overhead on every hook fire. This client lazily spawns `bd --server --json`
+    once and dispatches requests over stdin/stdout as length-prefixed JSON.
+    If the server mode is unavailable (older bd) or the process dies, calls
+    fall back to the per-invocation subprocess path transparently.
+    """
+
+    def __init__(self, beads_dir: str | None = None):
+        self._beads_dir = beads_dir
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._lock = asyncio.Lock()
+        self._broken = False
+
+    def _spawn(self) -> subprocess.Popen[bytes]:
+        """Spawn the bd server subprocess."""
+        return subprocess.Popen(
+            [bd_path() or "bd", "--server", "--json"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=_bd_env(self._beads_dir),
+        )
+
+    def _call_server(self, args: list[str], json_output: bool) -> tuple[bool, str]:
+        """Send one length-prefixed JSON request and read the framed reply."""
+        assert self._proc is not None
+        assert self._proc.stdin is not None and self._proc.stdout is not None
+
+        request = json.dumps({"args": args, "json": json_output}).encode()
+        self._proc.stdin.write(f"{len(request)}\n".encode() + request)
+        self._proc.stdin.flush()
+
+        header = self._proc.stdout.readline()
+        if not header:
+            raise BrokenPipeError("bd server closed its stdout")
+        reply = json.loads(self._proc.stdout.read(int(header)))
+        return reply.get("exit_code", 1) == 0, reply.get("output", "").strip()
+
+    async def call(
+        self, args: list[str], json_output: bool = True
+    ) -> tuple[bool, bytes | str]:
+        """Run a bd command, preferring the server; return (success, output).
+
+        Both paths keep the event loop free: the server round-trip runs in
+        a worker thread and the fallback uses the asyncio subprocess API,
+        so other hooks and tool traffic progress while bd works.
+        """
+        if not self._broken:
+            async with self._lock:
+                # Re-check under the lock: a call that was queued while the
+                # holder marked the client broken must not respawn the
+                # known-dead server
+                if not self._broken:
+                    try:
+                        if self._proc is None or self._proc.poll() is not None:
+                            self._proc = self._spawn()
+                        # Same 10s budget as every other bd path; a server
+                        # that accepts the spawn but never speaks the framed
+                        # protocol must not wedge the lock forever
+                        return await asyncio.wait_for(
+                            asyncio.to_thread(self._call_server, args, json_output),
+                            timeout=10,
+                        )
+                    except Exception as e:
+                        # Server mode unsupported, timed out, or process
+                        # died - fall back for good
+                        logger.debug(f"bd server unavailable, using per-call subprocess: {e}")
+                        self._broken = True
+                        if self._proc is not None:
+                            self._proc.kill()
+                            self._proc = None
+
+        return await run_bd_async(args, json_output=json_output, beads_dir=self._beads_dir)
+
+    def close(self) -> None:
+        """Terminate the server process if running."""
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc = None
+
+
+_bd_clients: dict[str | None, _BdClient] = {}
+
+
+def _get_bd_client(beads_dir: str | None) -> _BdClient:
+    """Return the per-session bd client for this beads_dir, creating it lazily."""
+    client = _bd_clients.get(beads_dir)
+    if client is None:
+        client = _bd_clients[beads_dir] = _BdClient(beads_dir)
+    return client
+
+
+# Flags (e.g. --fields, --limit) that the installed bd rejected; calls
+# retry without them, so newer bd gets smaller payloads and older bd
+# keeps working.
+_unsupported_flags: set[str] = set()
+
+# bd subcommands that change database state; any of these going through
+# the shared client drops the read cache so later queries can't serve
+# stale results.
+_MUTATING_OPS = frozenset({"create", "update", "close", "delete", "init", "sync"})
+
+
+async def call_bd(
+    args: list[str],
+    json_output: bool = True,
+    beads_dir: str | None = None,
+    optional_args: list[list[str]] | None = None,
+) -> tuple[bool, bytes | str]:
+    """Run a bd command via the shared client and return (success, output).
+
+    optional_args holds nice-to-have flag groups (e.g. ["--fields", ...]
+    or ["--limit", ...]) that shrink the payload when the installed bd
+    supports them. If bd complains about one, the call is retried without
+    that group and the flag is remembered as unsupported for the rest of
+    the process.
+    """
+    client = _get_bd_client(beads_dir)
+
+    if args and args[0] in _MUTATING_OPS:
+        invalidate_bd_cache()
+
+    groups = [g for g in (optional_args or []) if g[0] not in _unsupported_flags]
+    while True:
+        extra = [a for group in groups for a in group]
+        success, output = await client.call(args + extra, json_output=json_output)
+        if success or not groups:
+            return success, output
+
+        rejected = [g for g in groups if isinstance(output, str) and g[0] in output]
+        if not rejected:
+            # Genuine failure unrelated to the optional flags
+            return success, output
+        for group in rejected:
+            _unsupported_flags.add(group[0])
+        groups = [g for g in groups if g[0] not in _unsupported_flags]
+
+
+# Short-TTL cache for read-only bd calls, keyed on (args, beads_dir).
+# Coalesces the duplicate `bd list --status in_progress` between the
+# workflow-reminder and session-end hooks into a single subprocess+parse.
+_BD_CACHE_TTL = 3.0
+_bd_cache: dict[tuple[Any, ...], tuple[float, bool, Any]] = {}
+
+
+async def call_bd_cached(
+    args: list[str],
+    beads_dir: str | None = None,
+    ttl: float = _BD_CACHE_TTL,
+    optional_args: list[list[str]] | None = None,
+) -> tuple[bool, Any]:
+    """Run a read-only bd command and return (success, parsed JSON).
+
+    Results are cached for a few seconds so back-to-back hooks issuing the
+    same query share one subprocess call and one json.loads. The parsed
+    value is cached (not the raw string) so consumers skip re-parsing too.
+    """
+    key = (
+        tuple(args),
+        tuple(tuple(g) for g in optional_args or ()),
+        beads_dir,
+    )
+    now = time.monotonic()
+    cached = _bd_cache.get(key)
+    if cached is not None and now - cached[0] < ttl:
+        return cached[1], cached[2]
+
+    success, output = await call_bd(args, beads_dir=beads_dir, optional_args=optional_args)
+    parsed: Any = None
+    if success:
+        try:
+            parsed = _json_loads(output)
+        except ValueError:
+            logger.debug(f"Failed to parse bd {args[0]} output as JSON")
+            success = False
+
+    _bd_cache[key] = (now, success, parsed)
+    return success, parsed
+
+
+def invalidate_bd_cache() -> None:
+    """Drop all cached bd results (call after mutations or at session end)."""
+    _bd_cache.clear()
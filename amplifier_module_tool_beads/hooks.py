@@ -2,54 +2,65 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
-import shutil
-import subprocess
-from collections import deque
 from typing import Any
 
 from amplifier_core import HookResult
 
-logger = logging.getLogger(__name__)
-
-
-def _bd_available() -> bool:
-    """Check if bd CLI is available."""
-    return shutil.which("bd") is not None
-
+from ._bd import (
+    batch_update_notes as _batch_update_notes,
+)
+from ._bd import (
+    beads_db_exists as _beads_db_exists,
+)
+from ._bd import (
+    call_bd as _call_bd,
+)
+from ._bd import (
+    call_bd_cached as _call_bd_cached,
+)
+from ._bd import (
+    invalidate_bd_cache as _invalidate_bd_cache,
+)
+from ._bd import (
+    iter_issues as _iter_issues,
+)
+from ._bd import (
+    run_bd_async as _run_bd_async,
+)
 
-def _run_bd(
-    args: list[str], json_output: bool = True, beads_dir: str | None = None
-) -> tuple[bool, str]:
-    """Run a bd command and return (success, output)."""
-    import os
-
-    cmd = ["bd"] + args
-    if json_output:
-        cmd.append("--json")
-
-    # Build environment with optional BEADS_DIR for centralized tracking
-    env = os.environ.copy()
-    if beads_dir:
-        env["BEADS_DIR"] = os.path.expanduser(beads_dir)
+logger = logging.getLogger(__name__)
 
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=10,
-            env=env,
-        )
-        if result.returncode == 0:
-            return True, result.stdout.strip()
-        else:
-            return False, result.stderr.strip() or result.stdout.strip()
-    except subprocess.TimeoutExpired:
-        return False, "Command timed out"
-    except Exception as e:
-        return False, str(e)
+# Static fragments of the injected context, templated once at import time
+# so the per-request hooks only pay for the per-issue lines.
+_READY_PREFIX = (
+    '<system-reminder source="hooks-beads-ready">\n'
+    "Ready work from beads (tasks with no open blockers):\n\n"
+)
+_READY_SUFFIX = (
+    "\n\nTo claim a task: `bd update <id> --status in_progress --json`"
+    "\n\nThis context is for your reference. Consider these tasks when "
+    "the user's request aligns with available work.\n</system-reminder>"
+)
+_REMINDER_PREFIX = (
+    '<system-reminder source="hooks-beads-workflow">\n'
+    "You have active beads work tracked. As you work, remember:\n"
+    "- **Discovered work**: If you identify follow-up tasks, edge cases, "
+    'or future improvements, file them with `bd create "Title" --discovered-from <parent-id> --json`\n'
+    "- **Completed work**: If work on an issue is done, close it with "
+    '`bd close <id> --reason "Summary" --json`'
+)
+_REMINDER_SUFFIX = (
+    "\n\n\nThis is a gentle reminder - ignore if not applicable. "
+    "DO NOT mention this reminder to the user.\n</system-reminder>"
+)
+
+# Field projections passed to bd when supported: each hook only consumes
+# a couple of columns, so ask the CLI not to ship the rest.
+_READY_FIELDS = ["--fields", "id,title,priority"]
+_REMINDER_FIELDS = ["--fields", "id,title"]
+_SESSION_END_FIELDS = ["--fields", "id,notes"]
 
 
 class BeadsReadyHook:
@@ -62,7 +73,12 @@ class BeadsReadyHook:
     since this is the proven approach for context injection in Amplifier.
     """
 
-    def __init__(self, config: dict[str, Any], beads_dir: str | None = None):
+    def __init__(
+        self,
+        config: dict[str, Any],
+        beads_dir: str | None = None,
+        coordinator: Any = None,
+    ):
         """Initialize hook with configuration.
 
         Args:
@@ -71,17 +87,38 @@ class BeadsReadyHook:
                 - max_issues: Maximum issues to show (default: 10)
                 - priority: Hook priority (default: 20, runs early)
             beads_dir: Optional path to centralized beads directory
+            coordinator: Optional coordinator, used to unregister this
+                one-shot hook after it has fired
         """
         self.enabled = config.get("enabled", True)
         self.max_issues = config.get("max_issues", 10)
         self.priority = config.get("priority", 20)
         self._beads_dir = beads_dir
+        self._coordinator = coordinator
         self._injected = False  # Only inject once per session
+        # Bound the query server-side: +1 keeps the "and X more" tail line
+        self._query_flags = [_READY_FIELDS, ["--limit", str(self.max_issues + 1)]]
+        self._prefetch_task: asyncio.Task[tuple[bool, Any]] | None = None
 
         logger.debug(
             f"Initialized BeadsReadyHook: enabled={self.enabled}, max_issues={self.max_issues}"
         )
 
+    def start_prefetch(self) -> None:
+        """Kick the bd ready query off in the background at mount time.
+
+        The query then overlaps session startup instead of blocking the
+        first LLM request on a cold bd invocation.
+        """
+        if self.enabled and self._prefetch_task is None and _beads_db_exists(self._beads_dir):
+            self._prefetch_task = asyncio.create_task(
+                _call_bd_cached(
+                    ["ready"],
+                    beads_dir=self._beads_dir,
+                    optional_args=self._query_flags,
+                )
+            )
+
     async def on_provider_request(self, event: str, data: dict[str, Any]) -> HookResult:
         """Inject ready tasks into context before first LLM request.
 
@@ -101,47 +138,62 @@ class BeadsReadyHook:
         if not self.enabled:
             return HookResult(action="continue")
 
-        if not _bd_available():
-            # Silently skip if bd not installed
-            logger.debug("bd CLI not available, skipping ready injection")
+        if not _beads_db_exists(self._beads_dir):
+            # No beads database for this workspace - don't spawn bd at all
             return HookResult(action="continue")
 
-        # Check for ready tasks
-        success, output = _run_bd(["ready"], beads_dir=self._beads_dir)
+        # Check for ready tasks, consuming the mount-time prefetch if one
+        # is in flight (usually already finished by the first LLM request)
+        if self._prefetch_task is not None:
+            success, ready_data = await self._prefetch_task
+            self._prefetch_task = None
+        else:
+            success, ready_data = await _call_bd_cached(
+                ["ready"], beads_dir=self._beads_dir, optional_args=self._query_flags
+            )
         if not success:
-            # Not initialized or error - skip silently
-            logger.debug(f"bd ready failed: {output}")
+            # Not initialized, error, or unparseable output - skip silently
+            logger.debug("bd ready failed")
             return HookResult(action="continue")
 
-        try:
-            ready_data = json.loads(output)
-
-            # bd ready --json returns a list directly, not a dict
-            if isinstance(ready_data, list):
-                issues = ready_data
-            else:
-                issues = ready_data.get("issues", [])
-
-            self._injected = True  # Mark as done regardless of result
-
-            if not issues:
-                # No ready work - don't inject anything
-                return HookResult(action="continue")
-
-            context = self._format_ready_work(issues)
-            return HookResult(
-                action="inject_context",
-                context_injection=context,
-                context_injection_role="user",
-                ephemeral=True,
-                suppress_output=True,
-            )
+        # bd ready --json returns a list directly, not a dict
+        if isinstance(ready_data, list):
+            issues = ready_data
+        else:
+            issues = ready_data.get("issues", [])
+
+        self._finalize()  # Mark as done regardless of result
 
-        except json.JSONDecodeError:
-            logger.debug("Failed to parse bd ready output as JSON")
-            self._injected = True
+        if not issues:
+            # No ready work - don't inject anything
             return HookResult(action="continue")
 
+        context = self._format_ready_work(issues)
+        return HookResult(
+            action="inject_context",
+            context_injection=context,
+            context_injection_role="user",
+            ephemeral=True,
+            suppress_output=True,
+        )
+
+    def _finalize(self) -> None:
+        """Mark injection done and drop this handler from the event loop.
+
+        Where the hook registry supports unregistration, removing the
+        handler means later provider:request dispatches never even reach
+        the _injected check - this hook is one-shot by design.
+        """
+        self._injected = True
+        if self._coordinator is None:
+            return
+        unregister = getattr(self._coordinator.hooks, "unregister", None)
+        if unregister is not None:
+            try:
+                unregister(name="beads-ready")
+            except Exception as e:
+                logger.debug(f"Could not unregister beads-ready hook: {e}")
+
     def _format_ready_work(self, issues: list[dict[str, Any]]) -> str:
         """Format ready work for context injection.
 
@@ -151,31 +203,16 @@ class BeadsReadyHook:
         Returns:
             Formatted markdown string wrapped in system-reminder tags
         """
-        lines = ["Ready work from beads (tasks with no open blockers):", ""]
-
-        for issue in issues[: self.max_issues]:
-            issue_id = issue.get("id", "?")
-            title = issue.get("title", "Untitled")
-            priority = issue.get("priority", "")
-            priority_str = f" [{priority}]" if priority else ""
-            lines.append(f"- **{issue_id}**: {title}{priority_str}")
+        body = "\n".join(
+            f"- **{issue.get('id', '?')}**: {issue.get('title', 'Untitled')}"
+            f"{f' [{priority}]' if (priority := issue.get('priority')) else ''}"
+            for issue in issues[: self.max_issues]
+        )
 
         if len(issues) > self.max_issues:
-            lines.append(f"- ... and {len(issues) - self.max_issues} more")
-
-        lines.append("")
-        lines.append("To claim a task: `bd update <id> --status in_progress --json`")
+            body += f"\n- ... and {len(issues) - self.max_issues} more"
 
-        content = "\n".join(lines)
-
-        # Add behavioral note
-        behavioral_note = (
-            "\n\nThis context is for your reference. Consider these tasks when "
-            "the user's request aligns with available work."
-        )
-
-        # Wrap in system-reminder tag with source attribution
-        return f'<system-reminder source="hooks-beads-ready">\n{content}{behavioral_note}\n</system-reminder>'
+        return f"{_READY_PREFIX}{body}{_READY_SUFFIX}"
 
 
 class BeadsSessionEndHook:
@@ -215,51 +252,66 @@ class BeadsSessionEndHook:
         if not self.enabled:
             return HookResult(action="continue")
 
-        if not _bd_available():
-            return HookResult(action="continue")
-
         session_id = data.get("session_id")
         if not session_id:
             return HookResult(action="continue")
 
-        # Find issues claimed by this session
-        success, output = _run_bd(
-            ["list", "--status", "in_progress"], beads_dir=self._beads_dir
+        # End-of-session reads must see fresh state
+        _invalidate_bd_cache()
+
+        session_tag = f"[amplifier:claimed-by-session:{session_id}]"
+
+        # Find issues claimed by this session. When bd supports filtering
+        # by note content the predicate runs database-side and only
+        # matching issues cross the pipe; the client-side checks below
+        # stay correct either way.
+        success, output = await _call_bd(
+            ["list", "--status", "in_progress"],
+            beads_dir=self._beads_dir,
+            optional_args=[_SESSION_END_FIELDS, ["--notes-contains", session_tag]],
         )
         if not success:
             return HookResult(action="continue")
 
-        try:
-            list_data = json.loads(output)
-
-            # bd list --json returns a list directly, not a dict
-            if isinstance(list_data, list):
-                issues = list_data
-            else:
-                issues = list_data.get("issues", [])
-
-            # Look for issues with this session's claim tag
-            session_tag = f"[amplifier:claimed-by-session:{session_id}]"
+        # Cheap substring probe on the raw output first: in the common case
+        # this session never claimed an issue, and the tag is unique per
+        # session, so a miss here means the JSON parse can be skipped
+        raw = output if isinstance(output, bytes) else output.encode()
+        if session_tag.encode() not in raw:
+            return HookResult(action="continue")
 
-            for issue in issues:
+        # Look for issues with this session's claim tag, streaming the
+        # issue list so large outputs are never fully materialized
+        claimed_ids: list[str] = []
+        try:
+            for issue in _iter_issues(output):
                 notes = issue.get("notes", "")
                 if session_tag in notes:
                     issue_id = issue.get("id")
                     if issue_id:
-                        _run_bd(
-                            [
-                                "update",
-                                issue_id,
-                                "--notes",
-                                f"[amplifier:session-ended:{session_id}]",
-                            ],
+                        claimed_ids.append(issue_id)
+        except ValueError:
+            logger.debug("Failed to parse bd list output as JSON")
+
+        if claimed_ids:
+            # Prefer one batched bd call (one process, one transaction);
+            # fall back to fanning the updates out concurrently, bounded
+            # so many claimed issues don't turn into a fork storm
+            end_note = f"[amplifier:session-ended:{session_id}]"
+            if not await _batch_update_notes(claimed_ids, end_note, self._beads_dir):
+                semaphore = asyncio.Semaphore(8)
+
+                async def update_one(issue_id: str) -> None:
+                    async with semaphore:
+                        await _run_bd_async(
+                            ["update", issue_id, "--notes", end_note],
                             json_output=False,
                             beads_dir=self._beads_dir,
+                            capture=False,
                         )
-                        logger.debug(f"Marked session end on issue {issue_id}")
 
-        except json.JSONDecodeError:
-            pass
+                await asyncio.gather(*(update_one(iid) for iid in claimed_ids))
+            logger.debug(f"Marked session end on issues: {claimed_ids}")
 
         return HookResult(action="continue")
 
@@ -292,8 +344,10 @@ class BeadsWorkflowReminderHook:
         self.reminder_interval = config.get("reminder_interval", 8)
         self._beads_dir = beads_dir
 
-        # Track recent tool calls (circular buffer)
-        self.recent_tools: deque[str] = deque(maxlen=self.recent_tool_threshold)
+        # Monotonic tool-call index plus the index of the last bd usage:
+        # recency is an O(1) comparison with no per-call allocations
+        self._tool_call_index = 0
+        self._last_bd_call_index = -(10**9)
         # Counter to avoid reminding too frequently
         self._tool_calls_since_reminder = 0
         # Track if we've seen any beads usage this session
@@ -314,10 +368,17 @@ class BeadsWorkflowReminderHook:
         Returns:
             HookResult(action="continue")
         """
+        # Disabled hooks never consult the tracking state - skip all of it
+        if not self.enabled:
+            return HookResult(action="continue")
+
         tool_name = data.get("tool", "")
         if tool_name:
-            self.recent_tools.append(tool_name)
-            self._tool_calls_since_reminder += 1
+            self._tool_call_index += 1
+            # Saturating add: once the counter reaches reminder_interval the
+            # reminder is already due, so stop touching the attribute
+            if self._tool_calls_since_reminder < self.reminder_interval:
+                self._tool_calls_since_reminder += 1
 
             # Track if bd was used via bash
             if tool_name == "bash":
@@ -325,6 +386,7 @@ class BeadsWorkflowReminderHook:
                 command = tool_input.get("command", "") if isinstance(tool_input, dict) else ""
                 if "bd " in command or command.startswith("bd"):
                     self._beads_used_this_session = True
+                    self._last_bd_call_index = self._tool_call_index
                     self._tool_calls_since_reminder = 0  # Reset on bd usage
                     logger.debug("BeadsWorkflowReminderHook: bd CLI used via bash")
 
@@ -353,51 +415,45 @@ class BeadsWorkflowReminderHook:
             return HookResult(action="continue")
 
         # Check if bd was used recently (tracked via bash commands)
-        # If _tool_calls_since_reminder was reset recently, bd was used
-        if self._tool_calls_since_reminder < 3:
+        if self._tool_call_index - self._last_bd_call_index < self.recent_tool_threshold:
             return HookResult(action="continue")
 
         # Only remind if beads is available and has active work
-        if not _bd_available():
-            return HookResult(action="continue")
-
-        # Check for in-progress issues (indicates active work)
-        success, output = _run_bd(
-            ["list", "--status", "in_progress"], beads_dir=self._beads_dir
+        # Check for in-progress issues (indicates active work). The
+        # reminder shows at most 3 plus an "and X more" tail, so cap the
+        # query at 4 rows server-side.
+        success, list_data = await _call_bd_cached(
+            ["list", "--status", "in_progress"],
+            beads_dir=self._beads_dir,
+            optional_args=[_REMINDER_FIELDS, ["--limit", "4"]],
         )
         if not success:
             # Beads not initialized or error - skip silently
             return HookResult(action="continue")
 
-        try:
-            list_data = json.loads(output)
-            issues = list_data if isinstance(list_data, list) else list_data.get("issues", [])
+        issues = list_data if isinstance(list_data, list) else list_data.get("issues", [])
 
-            if not issues:
-                # No active work - no need to remind
-                return HookResult(action="continue")
-
-            # Reset counter since we're reminding
-            self._tool_calls_since_reminder = 0
+        if not issues:
+            # No active work - no need to remind
+            return HookResult(action="continue")
 
-            reminder = self._build_reminder(issues)
-            logger.debug(
-                f"BeadsWorkflowReminderHook: injecting reminder "
-                f"(recent_tools={list(self.recent_tools)}, in_progress={len(issues)})"
-            )
+        # Reset counter since we're reminding
+        self._tool_calls_since_reminder = 0
 
-            return HookResult(
-                action="inject_context",
-                context_injection=reminder,
-                context_injection_role="user",
-                ephemeral=True,
-                append_to_last_tool_result=True,
-                suppress_output=True,
-            )
+        reminder = self._build_reminder(issues)
+        logger.debug(
+            f"BeadsWorkflowReminderHook: injecting reminder "
+            f"(tool_calls={self._tool_call_index}, in_progress={len(issues)})"
+        )
 
-        except json.JSONDecodeError:
-            logger.debug("BeadsWorkflowReminderHook: failed to parse bd output")
-            return HookResult(action="continue")
+        return HookResult(
+            action="inject_context",
+            context_injection=reminder,
+            context_injection_role="user",
+            ephemeral=True,
+            append_to_last_tool_result=True,
+            suppress_output=True,
+        )
 
     def _build_reminder(self, in_progress_issues: list[dict[str, Any]]) -> str:
         """Build the reminder message.
@@ -408,32 +464,12 @@ class BeadsWorkflowReminderHook:
         Returns:
             Formatted reminder string
         """
-        parts = []
-
-        # Main reminder about workflow
-        parts.append(
-            "You have active beads work tracked. As you work, remember:\n"
-            "- **Discovered work**: If you identify follow-up tasks, edge cases, "
-            "or future improvements, file them with `bd create \"Title\" --discovered-from <parent-id> --json`\n"
-            "- **Completed work**: If work on an issue is done, close it with "
-            "`bd close <id> --reason \"Summary\" --json`"
+        body = "\n".join(
+            f"  - {issue.get('id', '?')}: {issue.get('title', 'Untitled')}"
+            for issue in in_progress_issues[:3]
         )
 
-        # Show current in-progress issues
-        if in_progress_issues:
-            parts.append("\nCurrently in progress:")
-            for issue in in_progress_issues[:3]:
-                issue_id = issue.get("id", "?")
-                title = issue.get("title", "Untitled")
-                parts.append(f"  - {issue_id}: {title}")
-            if len(in_progress_issues) > 3:
-                parts.append(f"  - ... and {len(in_progress_issues) - 3} more")
-
-        # Behavioral note
-        parts.append(
-            "\n\nThis is a gentle reminder - ignore if not applicable. "
-            "DO NOT mention this reminder to the user."
-        )
+        if len(in_progress_issues) > 3:
+            body += f"\n  - ... and {len(in_progress_issues) - 3} more"
 
-        content = "\n".join(parts)
-        return f'<system-reminder source="hooks-beads-workflow">\n{content}\n</system-reminder>'
+        return f"{_REMINDER_PREFIX}\n\nCurrently in progress:\n{body}{_REMINDER_SUFFIX}"